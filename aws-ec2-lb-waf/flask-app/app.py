@@ -48,8 +48,9 @@ REQUIRED AWS INFRASTRUCTURE:
    - Rate limiting rules for /api/data endpoint
 
 4. EC2 Instance Metadata Service (IMDS):
-   - Application automatically fetches instance metadata
-   - No additional configuration needed
+   - Application automatically fetches instance metadata (see instance_metadata.py)
+   - IMDSv2 session token is used when available, IMDSv1 otherwise
+   - All fields are fetched in parallel within IMDS_STARTUP_BUDGET seconds
    - Provides: instance-id, AZ, private IP, public IP, instance type
 
 REQUIRED SYSTEM PACKAGES:
@@ -88,6 +89,10 @@ import os
 import logging
 from datetime import datetime
 
+from instance_metadata import MetadataCache
+from server import run_server
+import responses
+
 # =============================================================================
 # ENVIRONMENT VARIABLES SETUP
 # =============================================================================
@@ -183,86 +188,28 @@ if app.config['DEBUG'] and ENVIRONMENT == 'production':
     logger.error("ERROR: Debug mode is enabled in production environment!")
     logger.error("Set DEBUG=False for production deployment")
 
-def get_instance_metadata():
+# Instance metadata cache - loaded once at startup, refreshed in the background
+# Handlers read metadata_cache.data (a plain dict, never blocks)
+metadata_cache = MetadataCache()
+metadata_cache.load()
+metadata_cache.start()
+
+def json_response(template, status=200, **values):
     """
-    Get EC2 instance metadata from AWS Instance Metadata Service (IMDS)
-    
-    AWS REQUIREMENTS:
-    - EC2 instance must have access to IMDS (enabled by default)
-    - No additional IAM permissions required for basic metadata
-    - Network access to 169.254.169.254 (link-local address)
-    - IMDS version 1 or 2 supported
-    
-    METADATA ENDPOINTS USED:
-    - http://169.254.169.254/latest/meta-data/instance-id
-    - http://169.254.169.254/latest/meta-data/placement/availability-zone
-    - http://169.254.169.254/latest/meta-data/local-ipv4
-    - http://169.254.169.254/latest/meta-data/public-ipv4 (if instance has public IP)
-    - http://169.254.169.254/latest/meta-data/instance-type
-    
-    FALLBACK BEHAVIOR:
-    - If metadata service is unavailable (local development), returns 'unknown' values
-    - Application continues to function without metadata
+    Build a JSON response from a pre-serialized template (see responses.py)
+
+    Produces the same bytes as jsonify({..., **metadata_cache.data}) but only
+    encodes the per-request values. Debug mode falls back to jsonify() so
+    the output stays pretty-printed.
     """
-    try:
-        # Instance ID - Unique identifier for the EC2 instance
-        instance_id = requests.get(
-            'http://169.254.169.254/latest/meta-data/instance-id', 
-            timeout=2
-        ).text
-        
-        # Availability Zone - AWS AZ where instance is running
-        az = requests.get(
-            'http://169.254.169.254/latest/meta-data/placement/availability-zone', 
-            timeout=2
-        ).text
-        
-        # Private IP - VPC private IP address assigned to instance
-        private_ip = requests.get(
-            'http://169.254.169.254/latest/meta-data/local-ipv4', 
-            timeout=2
-        ).text
-        
-        # Public IP - Elastic IP or auto-assigned public IP (if available)
-        try:
-            public_ip = requests.get(
-                'http://169.254.169.254/latest/meta-data/public-ipv4', 
-                timeout=2
-            ).text
-        except:
-            public_ip = 'N/A'  # Instance may not have public IP
-        
-        # Instance type - EC2 instance size (t3.micro, m5.large, etc.)
-        try:
-            instance_type = requests.get(
-                'http://169.254.169.254/latest/meta-data/instance-type', 
-                timeout=2
-            ).text
-        except:
-            instance_type = 'unknown'
-        
-        return {
-            'instance_id': instance_id,
-            'availability_zone': az,
-            'private_ip': private_ip,
-            'public_ip': public_ip,
-            'instance_type': instance_type,
-            'region': az[:-1] if az != 'unknown' else 'unknown'  # Extract region from AZ
-        }
-    except Exception as e:
-        logger.error(f"Error getting instance metadata: {e}")
-        # Return fallback values for local development or metadata service issues
-        return {
-            'instance_id': 'unknown',
-            'availability_zone': 'unknown',
-            'private_ip': 'unknown',
-            'public_ip': 'unknown',
-            'instance_type': 'unknown',
-            'region': 'unknown'
-        }
-
-# Global variable to cache metadata
-INSTANCE_METADATA = get_instance_metadata()
+    metadata = metadata_cache.data
+    if app.debug:
+        return jsonify(template.as_dict(metadata, **values)), status
+    return app.response_class(
+        template.render(metadata, **values),
+        status=status,
+        mimetype=app.json.mimetype
+    )
 
 @app.before_request
 def add_security_headers():
@@ -281,7 +228,7 @@ def after_request(response):
 @app.route('/')
 def index():
     """Main page with testing interface"""
-    return render_template('index.html', metadata=INSTANCE_METADATA)
+    return render_template('index.html', metadata=metadata_cache.data)
 
 @app.route('/health')
 def health():
@@ -304,32 +251,21 @@ def health():
     - JSON response with instance metadata
     - Used by ALB to determine instance health
     """
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
-        'service': 'ec2-alb-waf-demo',
-        **INSTANCE_METADATA
-    }), 200
+    return json_response(responses.HEALTH, 200, timestamp=datetime.utcnow().isoformat())
 
 @app.route('/api/status')
 def api_status():
     """API status endpoint"""
-    return jsonify({
-        'status': 'operational',
-        'service': 'ec2-alb-waf-demo',
-        'version': '1.0.0',
-        'timestamp': datetime.utcnow().isoformat(),
-        'uptime': time.time(),
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.API_STATUS,
+        timestamp=datetime.utcnow().isoformat(),
+        uptime=time.time()
+    )
 
 @app.route('/api/instance-info')
 def instance_info():
     """Get detailed instance information"""
-    return jsonify({
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+    return json_response(responses.INSTANCE_INFO, timestamp=datetime.utcnow().isoformat())
 
 @app.route('/search')
 def search():
@@ -354,17 +290,11 @@ def search():
     logger.info(f"Search query received: {query}")
     
     # This endpoint is intentionally vulnerable to test WAF SQL injection rules
-    return jsonify({
-        'query': query,
-        'results': [
-            {'id': 1, 'title': 'Sample Result 1', 'description': 'This is a sample search result'},
-            {'id': 2, 'title': 'Sample Result 2', 'description': 'Another sample result'},
-            {'id': 3, 'title': 'Sample Result 3', 'description': 'Yet another result'}
-        ],
-        'total_results': 3,
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.SEARCH,
+        query=query,
+        timestamp=datetime.utcnow().isoformat()
+    )
 
 @app.route('/comment', methods=['POST'])
 def comment():
@@ -391,20 +321,15 @@ def comment():
         logger.info(f"Comment received: {comment_text}")
         
         # This endpoint is intentionally vulnerable to test WAF XSS rules
-        return jsonify({
-            'comment': comment_text,
-            'status': 'received',
-            'comment_id': int(time.time()),
-            'timestamp': datetime.utcnow().isoformat(),
-            **INSTANCE_METADATA
-        })
+        return json_response(
+            responses.COMMENT,
+            comment=comment_text,
+            comment_id=int(time.time()),
+            timestamp=datetime.utcnow().isoformat()
+        )
     except Exception as e:
         logger.error(f"Error processing comment: {e}")
-        return jsonify({
-            'error': 'Invalid request format',
-            'timestamp': datetime.utcnow().isoformat(),
-            **INSTANCE_METADATA
-        }), 400
+        return json_response(responses.COMMENT_INVALID, 400, timestamp=datetime.utcnow().isoformat())
 
 @app.route('/api/data')
 def api_data():
@@ -424,12 +349,11 @@ def api_data():
     - Set up alarms for unusual traffic patterns
     - Use AWS WAF logs for detailed analysis
     """
-    return jsonify({
-        'data': 'sample data payload',
-        'timestamp': datetime.utcnow().isoformat(),
-        'request_count': 1,
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.API_DATA,
+        timestamp=datetime.utcnow().isoformat(),
+        request_count=1
+    )
 
 @app.route('/api/file')
 def api_file():
@@ -454,13 +378,11 @@ def api_file():
     logger.info(f"File request: {file_path}")
     
     # This endpoint is intentionally vulnerable to test WAF path traversal rules
-    return jsonify({
-        'requested_path': file_path,
-        'status': 'file_not_found',
-        'message': 'This is a demo endpoint for testing path traversal protection',
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.API_FILE,
+        requested_path=file_path,
+        timestamp=datetime.utcnow().isoformat()
+    )
 
 @app.route('/admin')
 @app.route('/admin/')
@@ -488,13 +410,11 @@ def admin_area(subpath=''):
     """
     logger.warning(f"Admin area access attempt: {subpath}")
     
-    return jsonify({
-        'message': 'Admin area access',
-        'path': f'/admin/{subpath}' if subpath else '/admin',
-        'note': 'This should be blocked by WAF rules',
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.ADMIN,
+        path=f'/admin/{subpath}' if subpath else '/admin',
+        timestamp=datetime.utcnow().isoformat()
+    )
 
 @app.route('/api/load-test')
 def load_test():
@@ -508,46 +428,35 @@ def load_test():
     except:
         pass
     
-    return jsonify({
-        'message': 'Load test endpoint',
-        'processing_delay': processing_time,
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+    return json_response(
+        responses.LOAD_TEST,
+        processing_delay=processing_time,
+        timestamp=datetime.utcnow().isoformat()
+    )
 
 @app.route('/api/metrics')
 def metrics():
     """Basic metrics endpoint"""
-    return jsonify({
-        'metrics': {
+    return json_response(
+        responses.METRICS,
+        metrics={
             'cpu_usage': 'N/A',  # Would need additional libraries for real metrics
             'memory_usage': 'N/A',
             'disk_usage': 'N/A',
             'network_io': 'N/A'
         },
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    })
+        timestamp=datetime.utcnow().isoformat()
+    )
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({
-        'error': 'Not Found',
-        'message': 'The requested resource was not found',
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    }), 404
+    return json_response(responses.NOT_FOUND, 404, timestamp=datetime.utcnow().isoformat())
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    return jsonify({
-        'error': 'Internal Server Error',
-        'message': 'An internal server error occurred',
-        'timestamp': datetime.utcnow().isoformat(),
-        **INSTANCE_METADATA
-    }), 500
+    return json_response(responses.INTERNAL_ERROR, 500, timestamp=datetime.utcnow().isoformat())
 
 if __name__ == '__main__':
     """
@@ -593,6 +502,12 @@ if __name__ == '__main__':
     $ sudo systemctl enable webapp
     $ sudo systemctl start webapp
     
+    Method 4: Production WSGI server (gunicorn pre-fork workers)
+    $ export SERVER_MODE=production
+    $ export WEB_WORKERS=4 WEB_THREADS=4
+    $ python3 run.py
+    $ kill -HUP <master pid>   # graceful worker reload
+    
     SYSTEMD SERVICE CONFIGURATION:
     - Service file: /etc/systemd/system/webapp.service
     - Environment file: /opt/flask-app/.env
@@ -653,7 +568,7 @@ if __name__ == '__main__':
     logger.info(f"Debug Mode: {app.config['DEBUG']}")
     logger.info(f"AWS Region: {AWS_REGION}")
     logger.info(f"Request Timeout: {request_timeout}s")
-    logger.info(f"Instance Metadata: {INSTANCE_METADATA}")
+    logger.info(f"Instance Metadata: {metadata_cache.data}")
     logger.info("=" * 60)
     
     # =============================================================================
@@ -676,13 +591,12 @@ if __name__ == '__main__':
     # =============================================================================
     
     try:
-        # Run the Flask application
-        app.run(
+        # Run the Flask application (SERVER_MODE selects the server, see server.py)
+        run_server(
+            app,
             host=host,           # Interface from environment variable
             port=port,           # Port from environment variable
-            debug=False,         # Always False for security (use DEBUG env var for app logic)
-            threaded=True,       # Enable threading for concurrent requests
-            use_reloader=False   # Disable reloader in production
+            debug=False          # Always False for security (use DEBUG env var for app logic)
         )
     except KeyboardInterrupt:
         logger.info("Application stopped by user")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the Flask application hot paths
+
+Runs in-process (no server, no network) so results reflect CPU cost only.
+
+Usage:
+    python benchmark.py responses [--iterations 20000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+
+def timeit(func, iterations: int) -> float:
+    """Return the mean cost of func() in microseconds"""
+    for _ in range(min(1000, iterations)):
+        func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_responses(args) -> bool:
+    """
+    jsonify() versus pre-serialized templates for every JSON route
+
+    'jsonify us' and 'template us' include building the Response object;
+    'render us' is the template body rendering alone.
+    """
+    from flask import jsonify
+    from app import app, metadata_cache
+    import responses
+
+    metadata = metadata_cache.data
+    timestamp = datetime.utcnow().isoformat()
+    cases = [
+        ('health', responses.HEALTH, {'timestamp': timestamp}),
+        ('api_status', responses.API_STATUS, {'timestamp': timestamp, 'uptime': time.time()}),
+        ('instance_info', responses.INSTANCE_INFO, {'timestamp': timestamp}),
+        ('search', responses.SEARCH, {'query': "' OR 1=1 -- café \"<script>\"", 'timestamp': timestamp}),
+        ('comment', responses.COMMENT, {'comment': '<img src=x>', 'comment_id': 1700000000, 'timestamp': timestamp}),
+        ('api_data', responses.API_DATA, {'timestamp': timestamp, 'request_count': 42}),
+        ('load_test', responses.LOAD_TEST, {'processing_delay': '0.5', 'timestamp': timestamp}),
+        ('not_found', responses.NOT_FOUND, {'timestamp': timestamp}),
+    ]
+
+    print(f"{'route':<15} {'identical':>9} {'jsonify us':>11} {'template us':>12} {'render us':>10} {'speedup':>8}")
+    all_identical = True
+    with app.app_context():
+        for name, template, values in cases:
+            expected = jsonify(template.as_dict(metadata, **values)).get_data()
+            actual = template.render(metadata, **values)
+            identical = expected == actual
+            all_identical = all_identical and identical
+
+            jsonify_us = timeit(lambda: jsonify(template.as_dict(metadata, **values)).get_data(), args.iterations)
+            template_us = timeit(lambda: app.response_class(
+                template.render(metadata, **values), mimetype=app.json.mimetype).get_data(), args.iterations)
+            render_us = timeit(lambda: template.render(metadata, **values), args.iterations)
+            print(f"{name:<15} {'yes' if identical else 'NO':>9} {jsonify_us:>11.2f} "
+                  f"{template_us:>12.2f} {render_us:>10.2f} {jsonify_us / template_us:>7.1f}x")
+
+    print("✅ All templates byte-identical to jsonify()" if all_identical else "❌ Output differs from jsonify()")
+    return all_identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for the Flask application')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    responses_parser = subparsers.add_parser('responses', help='Pre-serialized JSON responses vs jsonify()')
+    responses_parser.add_argument('--iterations', type=int, default=20000)
+    responses_parser.set_defaults(func=bench_responses)
+
+    args = parser.parse_args()
+    ok = args.func(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+EC2 Instance Metadata loader for the Flask demo application
+
+Fetches the instance metadata fields used by the application from the
+EC2 Instance Metadata Service (IMDS) concurrently, within a fixed startup
+budget, so that instances without IMDS (local development) and cold
+instances in an Auto Scaling Group both start serving quickly.
+
+=== HOW IT WORKS ===
+
+1. One IMDSv2 session token is requested with PUT /latest/api/token
+   - If the token request fails with an HTTP error, IMDSv1 is used
+   - If IMDS is not reachable at all, all fields fall back immediately
+2. All metadata fields are fetched in parallel over one pooled session
+3. The whole load must finish within IMDS_STARTUP_BUDGET seconds
+   - Fields that are not ready by the deadline use their fallback value
+   - Startup never waits for slow fields beyond the budget
+4. The time taken by each field is recorded in loader.timings
+
+After startup, MetadataCache keeps the metadata fresh: a background
+thread reloads it every METADATA_TTL seconds while request handlers keep
+reading the last good value (stale-while-revalidate).
+
+ENVIRONMENT VARIABLES:
+- IMDS_STARTUP_BUDGET (optional) - Default: 3.0
+  Total seconds allowed for the whole metadata load at startup
+- IMDS_REQUEST_TIMEOUT (optional) - Default: 1.0
+  Per-request connect/read timeout in seconds
+- METADATA_TTL (optional) - Default: 300
+  Seconds before cached metadata is considered stale and reloaded
+- METADATA_RETRY_INTERVAL (optional) - Default: 30
+  Seconds between reload attempts while the last load failed
+"""
+
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# IMDS link-local endpoint and IMDSv2 token settings
+IMDS_BASE_URL = 'http://169.254.169.254'
+IMDS_TOKEN_PATH = '/latest/api/token'
+IMDS_TOKEN_TTL_SECONDS = 21600
+
+# Metadata fields used by the application: field name -> IMDS path
+METADATA_FIELDS = {
+    'instance_id': '/latest/meta-data/instance-id',
+    'availability_zone': '/latest/meta-data/placement/availability-zone',
+    'private_ip': '/latest/meta-data/local-ipv4',
+    'public_ip': '/latest/meta-data/public-ipv4',
+    'instance_type': '/latest/meta-data/instance-type',
+}
+
+# Fallback for a single field when IMDS is reachable but the field is not.
+# Instances without a public IP return 404 for public-ipv4.
+FIELD_FALLBACKS = {
+    'public_ip': 'N/A',
+}
+
+UNKNOWN = 'unknown'
+
+
+def fallback_metadata() -> dict:
+    """Metadata used when IMDS is unavailable (local development)"""
+    metadata = {field: UNKNOWN for field in METADATA_FIELDS}
+    metadata['region'] = UNKNOWN
+    return metadata
+
+
+class MetadataLoader:
+    """
+    Concurrent, IMDSv2-aware loader for EC2 instance metadata
+
+    Usage:
+        loader = MetadataLoader()
+        metadata = loader.load()
+        loader.timings   # {'token': 1.2, 'instance_id': 0.8, ...} in ms
+    """
+
+    def __init__(self, base_url: str = IMDS_BASE_URL, budget: float = None,
+                 request_timeout: float = None):
+        self.base_url = base_url.rstrip('/')
+        self.budget = budget if budget is not None else float(
+            os.environ.get('IMDS_STARTUP_BUDGET', 3.0))
+        self.request_timeout = request_timeout if request_timeout is not None else float(
+            os.environ.get('IMDS_REQUEST_TIMEOUT', 1.0))
+        self.timings = {}
+        self.imds_version = None
+
+    def _session(self) -> requests.Session:
+        """One session, one connection pool sized for the parallel field fetches"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(METADATA_FIELDS), max_retries=0)
+        session.mount('http://', adapter)
+        # IMDS is link-local; never route it through an HTTP proxy
+        session.trust_env = False
+        return session
+
+    def _timeout(self, deadline: float) -> float:
+        return max(0.05, min(self.request_timeout, deadline - time.monotonic()))
+
+    def _fetch_token(self, session: requests.Session, deadline: float):
+        """
+        Fetch an IMDSv2 session token
+
+        Returns the token, None to fall back to IMDSv1, or raises
+        requests.exceptions.RequestException when IMDS is unreachable.
+        """
+        start = time.monotonic()
+        try:
+            response = session.put(
+                f"{self.base_url}{IMDS_TOKEN_PATH}",
+                headers={'X-aws-ec2-metadata-token-ttl-seconds': str(IMDS_TOKEN_TTL_SECONDS)},
+                timeout=self._timeout(deadline)
+            )
+        finally:
+            self.timings['token'] = (time.monotonic() - start) * 1000
+        if response.status_code == 200:
+            return response.text
+        logger.info(f"IMDSv2 token request returned {response.status_code}, using IMDSv1")
+        return None
+
+    def _fetch_field(self, session: requests.Session, field: str, headers: dict, deadline: float):
+        start = time.monotonic()
+        try:
+            response = session.get(
+                f"{self.base_url}{METADATA_FIELDS[field]}",
+                headers=headers,
+                timeout=self._timeout(deadline)
+            )
+            if response.status_code == 200:
+                return response.text
+            return None
+        finally:
+            self.timings[field] = (time.monotonic() - start) * 1000
+
+    def load(self) -> dict:
+        """
+        Load all metadata fields within the startup budget
+
+        FALLBACK BEHAVIOR:
+        - IMDS unreachable: every field is 'unknown'
+        - A single field failing or missing the deadline: 'unknown'
+          ('N/A' for public_ip, which is absent on private instances)
+        """
+        started = time.monotonic()
+        deadline = started + self.budget
+        self.timings = {}
+        session = self._session()
+
+        try:
+            token = self._fetch_token(session, deadline)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error getting instance metadata: {e}")
+            self.timings['total'] = (time.monotonic() - started) * 1000
+            session.close()
+            return fallback_metadata()
+
+        self.imds_version = 2 if token else 1
+        headers = {'X-aws-ec2-metadata-token': token} if token else {}
+
+        metadata = {}
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(METADATA_FIELDS), thread_name_prefix='imds')
+        futures = {
+            executor.submit(self._fetch_field, session, field, headers, deadline): field
+            for field in METADATA_FIELDS
+        }
+        done, not_done = concurrent.futures.wait(
+            futures, timeout=max(0.0, deadline - time.monotonic()))
+
+        for future in done:
+            field = futures[future]
+            try:
+                metadata[field] = future.result()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Metadata field {field} failed: {e}")
+                metadata[field] = None
+
+        for future in not_done:
+            field = futures[future]
+            logger.warning(f"Metadata field {field} missed the {self.budget}s startup budget")
+            self.timings.setdefault(field, (time.monotonic() - started) * 1000)
+
+        # Do not wait for stragglers; their per-request timeout bounds them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        result = {}
+        for field in METADATA_FIELDS:
+            value = metadata.get(field)
+            result[field] = value if value else FIELD_FALLBACKS.get(field, UNKNOWN)
+
+        az = result['availability_zone']
+        result['region'] = az[:-1] if az != UNKNOWN else UNKNOWN  # Extract region from AZ
+
+        self.timings['total'] = (time.monotonic() - started) * 1000
+        if not not_done:
+            session.close()
+        return result
+
+
+def get_instance_metadata() -> dict:
+    """
+    Get EC2 instance metadata from AWS Instance Metadata Service (IMDS)
+
+    Loads all fields concurrently within IMDS_STARTUP_BUDGET seconds and
+    logs how long each field took.
+    """
+    loader = MetadataLoader()
+    metadata = loader.load()
+    _log_timings(loader)
+    return metadata
+
+
+def _log_timings(loader: MetadataLoader):
+    timings = ', '.join(f"{name}={ms:.1f}ms" for name, ms in loader.timings.items())
+    logger.info(f"Instance metadata loaded (IMDSv{loader.imds_version or '-'}): {timings}")
+
+
+class MetadataCache:
+    """
+    Instance metadata cache with TTL and background refresh
+
+    READ PATH:
+    - cache.data is a plain dict that is replaced, never mutated
+    - Reading it is a single attribute lookup and never blocks
+
+    REFRESH BEHAVIOR:
+    - A daemon thread reloads the metadata every ttl seconds
+    - While a reload runs, readers keep getting the previous value
+    - Fields that fail to reload keep their last known value (stale)
+    - After a failed reload the thread retries every retry_interval seconds
+    - request_refresh() wakes the thread early without waiting for it
+    - The thread is restarted automatically in forked worker processes
+
+    Listeners registered with add_listener(callback) are called with the
+    new dict whenever the metadata actually changes; cache.version is
+    incremented on every change.
+    """
+
+    def __init__(self, loader_factory=MetadataLoader, ttl: float = None,
+                 retry_interval: float = None):
+        self.loader_factory = loader_factory
+        self.ttl = ttl if ttl is not None else float(os.environ.get('METADATA_TTL', 300))
+        self.retry_interval = retry_interval if retry_interval is not None else float(
+            os.environ.get('METADATA_RETRY_INTERVAL', 30))
+        self.data = fallback_metadata()
+        self.version = 0
+        self.fetched_at = None
+        self.last_refresh_ok = False
+        self._listeners = []
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+        self._fork_hook_registered = False
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last successful load (inf if never loaded)"""
+        if self.fetched_at is None:
+            return float('inf')
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age > self.ttl
+
+    def add_listener(self, callback):
+        """Call callback(data) whenever the cached metadata changes"""
+        self._listeners.append(callback)
+
+    def _publish(self, data: dict):
+        if data == self.data:
+            return
+        self.data = data
+        self.version += 1
+        for callback in self._listeners:
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error(f"Metadata listener {callback!r} failed: {e}")
+
+    def refresh(self) -> bool:
+        """
+        Reload the metadata now (blocking the caller, never the readers)
+
+        Returns True if every field was loaded successfully.
+        """
+        with self._refresh_lock:
+            loader = self.loader_factory()
+            fresh = loader.load()
+            current = self.data
+            if fresh['instance_id'] == UNKNOWN and current['instance_id'] != UNKNOWN:
+                # IMDS unavailable: serve the last good value rather than fallbacks
+                self.last_refresh_ok = False
+                return False
+            merged = {
+                field: current[field] if value == UNKNOWN and current.get(field, UNKNOWN) != UNKNOWN else value
+                for field, value in fresh.items()
+            }
+            ok = all(value != UNKNOWN for value in fresh.values())
+            if any(value != UNKNOWN for value in fresh.values()):
+                self.fetched_at = time.monotonic()
+            self.last_refresh_ok = ok
+            if merged != current:
+                logger.info(f"Instance metadata updated: {merged}")
+            self._publish(merged)
+            return ok
+
+    def load(self) -> dict:
+        """Initial synchronous load at startup (bounded by IMDS_STARTUP_BUDGET)"""
+        loader = self.loader_factory()
+        data = loader.load()
+        _log_timings(loader)
+        self.last_refresh_ok = all(value != UNKNOWN for value in data.values())
+        if any(value != UNKNOWN for value in data.values()):
+            self.fetched_at = time.monotonic()
+        self._publish(data)
+        return self.data
+
+    def request_refresh(self):
+        """Ask the background thread to reload now; returns immediately"""
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background refresher thread (idempotent)"""
+        if not self._fork_hook_registered and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook_registered = True
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='metadata-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+
+    def _after_fork(self):
+        # Threads do not survive fork(); give the child its own refresher
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        if self._running:
+            self.start()
+
+    def _run(self):
+        while self._running:
+            interval = self.ttl if self.last_refresh_ok else self.retry_interval
+            if self.fetched_at is not None and self.last_refresh_ok:
+                interval = max(0.0, self.ttl - self.age)
+            self._wakeup.wait(timeout=interval)
+            self._wakeup.clear()
+            if not self._running:
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background metadata refresh failed: {e}")
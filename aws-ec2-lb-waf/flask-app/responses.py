@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Pre-serialized JSON response templates for the Flask demo application
+
+Most JSON endpoints return the same static fields plus the instance
+metadata, with only one or two per-request fields (timestamp, query, ...).
+JSONTemplate keeps everything except those per-request fields as
+pre-encoded JSON text and only encodes the per-request values when a
+response is rendered.
+
+=== OUTPUT FORMAT ===
+
+The rendered body is byte-identical to Flask's jsonify() with the default
+JSON provider outside debug mode:
+- keys sorted, compact separators (",", ":"), ASCII-only output
+- trailing newline
+
+Metadata keys win over template keys on collision, matching the
+{..., **metadata} spread the handlers used before.
+
+The pre-encoded layout is rebuilt only when a different metadata dict is
+passed in (MetadataCache replaces the dict whenever the metadata changes).
+"""
+
+import json
+
+SERVICE_NAME = 'ec2-alb-waf-demo'
+SERVICE_VERSION = '1.0.0'
+
+# Same settings as Flask's DefaultJSONProvider.response() outside debug mode
+_encoder = json.JSONEncoder(ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+encode = _encoder.encode
+
+
+class JSONTemplate:
+    """
+    JSON object template with pre-encoded static and metadata members
+
+    Usage:
+        HEALTH = JSONTemplate({'status': 'healthy'}, fields=('timestamp',))
+        body = HEALTH.render(metadata, timestamp='2024-01-01T00:00:00')
+    """
+
+    def __init__(self, static: dict = None, fields: tuple = ()):
+        self.static = dict(static or {})
+        self.fields = tuple(fields)
+        overlap = set(self.static) & set(self.fields)
+        if overlap:
+            raise ValueError(f"Keys cannot be both static and per-request: {sorted(overlap)}")
+        # (metadata dict, fixed text chunks, slot keys) - replaced as one tuple
+        self._compiled = (None, None, None)
+
+    def as_dict(self, metadata: dict, **values) -> dict:
+        """The response as a dict, e.g. for jsonify() in debug mode"""
+        return {**self.static, **{key: values[key] for key in self.fields}, **metadata}
+
+    def _compile(self, metadata: dict):
+        members = {key: None for key in self.fields}
+        members.update((key, encode(value)) for key, value in self.static.items())
+        members.update((key, encode(value)) for key, value in metadata.items())
+
+        fixed = []
+        slots = []
+        chunk = '{'
+        first = True
+        for key in sorted(members):
+            chunk += ('' if first else ',') + encode(key) + ':'
+            first = False
+            if members[key] is None:
+                fixed.append(chunk)
+                slots.append(key)
+                chunk = ''
+            else:
+                chunk += members[key]
+        fixed.append(chunk + '}\n')
+
+        compiled = (metadata, tuple(fixed), tuple(slots))
+        self._compiled = compiled
+        return compiled
+
+    def render(self, metadata: dict, **values) -> bytes:
+        """Render the response body; only the per-request values are encoded"""
+        compiled = self._compiled
+        if compiled[0] is not metadata:
+            compiled = self._compile(metadata)
+        _, fixed, slots = compiled
+
+        pieces = [fixed[0]]
+        for key, text in zip(slots, fixed[1:]):
+            pieces.append(encode(values[key]))
+            pieces.append(text)
+        return ''.join(pieces).encode('ascii')
+
+
+# =============================================================================
+# ROUTE RESPONSE TEMPLATES
+# =============================================================================
+
+HEALTH = JSONTemplate({
+    'status': 'healthy',
+    'service': SERVICE_NAME,
+}, fields=('timestamp',))
+
+API_STATUS = JSONTemplate({
+    'status': 'operational',
+    'service': SERVICE_NAME,
+    'version': SERVICE_VERSION,
+}, fields=('timestamp', 'uptime'))
+
+INSTANCE_INFO = JSONTemplate(fields=('timestamp',))
+
+SEARCH = JSONTemplate({
+    'results': [
+        {'id': 1, 'title': 'Sample Result 1', 'description': 'This is a sample search result'},
+        {'id': 2, 'title': 'Sample Result 2', 'description': 'Another sample result'},
+        {'id': 3, 'title': 'Sample Result 3', 'description': 'Yet another result'}
+    ],
+    'total_results': 3,
+}, fields=('query', 'timestamp'))
+
+COMMENT = JSONTemplate({
+    'status': 'received',
+}, fields=('comment', 'comment_id', 'timestamp'))
+
+COMMENT_INVALID = JSONTemplate({
+    'error': 'Invalid request format',
+}, fields=('timestamp',))
+
+API_DATA = JSONTemplate({
+    'data': 'sample data payload',
+}, fields=('timestamp', 'request_count'))
+
+API_FILE = JSONTemplate({
+    'status': 'file_not_found',
+    'message': 'This is a demo endpoint for testing path traversal protection',
+}, fields=('requested_path', 'timestamp'))
+
+ADMIN = JSONTemplate({
+    'message': 'Admin area access',
+    'note': 'This should be blocked by WAF rules',
+}, fields=('path', 'timestamp'))
+
+LOAD_TEST = JSONTemplate({
+    'message': 'Load test endpoint',
+}, fields=('processing_delay', 'timestamp'))
+
+METRICS = JSONTemplate(fields=('metrics', 'timestamp'))
+
+NOT_FOUND = JSONTemplate({
+    'error': 'Not Found',
+    'message': 'The requested resource was not found',
+}, fields=('timestamp',))
+
+INTERNAL_ERROR = JSONTemplate({
+    'error': 'Internal Server Error',
+    'message': 'An internal server error occurred',
+}, fields=('timestamp',))
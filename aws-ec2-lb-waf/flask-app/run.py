@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """
 Startup script for the Flask application
+
+Set SERVER_MODE=production to serve with gunicorn worker processes
+instead of the development server (see server.py).
 """
 
 import os
 import sys
 from app import app
+from server import run_server
 
 if __name__ == '__main__':
     # Get port from environment or default to 8080
@@ -15,10 +19,6 @@ if __name__ == '__main__':
     
     print(f"Starting Flask app on {host}:{port}")
     print(f"Debug mode: {debug}")
+    print(f"Server mode: {os.environ.get('SERVER_MODE', 'development')}")
     
-    app.run(
-        host=host,
-        port=port,
-        debug=debug,
-        threaded=True
-    )
+    run_server(app, host, port, debug=debug)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+WSGI server selection for the Flask application
+
+Both run.py and `python app.py` start the application through
+run_server(), which picks the server from the SERVER_MODE environment
+variable:
+
+SERVER_MODE=development (default)
+- Werkzeug development server, single process, threaded=True
+- Fine for local development and the WAF/ALB demo
+
+SERVER_MODE=production
+- gunicorn pre-fork server with multiple worker processes
+- The application (and its instance metadata) is loaded once in the
+  master process before workers are forked (preload)
+- `kill -HUP <master pid>` (systemctl reload webapp) gracefully replaces
+  all workers; in-flight requests finish on the old workers
+- Workers are recycled after WEB_MAX_REQUESTS requests (+ jitter)
+
+ENVIRONMENT VARIABLES (production mode):
+- WEB_WORKERS - Default: 2 * CPU cores + 1
+- WEB_THREADS - Threads per worker, Default: 4 (gthread worker; 1 = sync worker)
+- WEB_MAX_REQUESTS - Recycle a worker after this many requests, Default: 10000 (0 = never)
+- WEB_MAX_REQUESTS_JITTER - Random extra requests before recycling, Default: 10% of WEB_MAX_REQUESTS
+- WEB_KEEPALIVE - Keep-alive seconds, Default: 65 (must exceed the ALB idle timeout of 60s)
+- WEB_GRACEFUL_TIMEOUT - Seconds workers get to finish requests on reload/stop, Default: 30
+- REQUEST_TIMEOUT - Seconds before a silent worker is killed and restarted, Default: 30
+
+Requires gunicorn (see requirements.txt). If it is not installed the
+development server is used and an error is logged.
+"""
+
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn not installed, only development mode available
+    BaseApplication = None
+
+
+def production_options(host: str, port: int) -> dict:
+    """gunicorn settings built from environment variables"""
+    workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('WEB_THREADS', 4))
+    max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000))
+    max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', max_requests // 10))
+
+    return {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': True,
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests_jitter,
+        'keepalive': int(os.environ.get('WEB_KEEPALIVE', 65)),
+        'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+        'timeout': int(os.environ.get('REQUEST_TIMEOUT', 30)),
+        'proc_name': 'webapp',
+        'accesslog': None,
+        'errorlog': '-',
+        'loglevel': os.environ.get('LOG_LEVEL', 'INFO').lower(),
+    }
+
+
+if BaseApplication is not None:
+    class GunicornApplication(BaseApplication):
+        """Run an already-imported WSGI app under gunicorn (no config file needed)"""
+
+        def __init__(self, application, options: dict):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key.lower(), value)
+
+        def load(self):
+            return self.application
+
+
+def run_server(app, host: str, port: int, debug: bool = False):
+    """Start app with the server selected by SERVER_MODE"""
+    mode = os.environ.get('SERVER_MODE', 'development').lower()
+
+    if mode == 'production':
+        if BaseApplication is None:
+            logger.error("SERVER_MODE=production requires gunicorn (pip3 install -r requirements.txt)")
+            logger.error("Falling back to the development server")
+        else:
+            options = production_options(host, port)
+            logger.info(
+                f"Starting gunicorn: {options['workers']} workers x {options['threads']} threads "
+                f"({options['worker_class']}), max_requests={options['max_requests']}"
+            )
+            GunicornApplication(app, options).run()
+            return
+
+    elif mode != 'development':
+        logger.warning(f"Unknown SERVER_MODE '{mode}', using development server")
+
+    app.run(
+        host=host,
+        port=port,
+        debug=debug,
+        threaded=True,       # Enable threading for concurrent requests
+        use_reloader=False   # Disable reloader in production
+    )